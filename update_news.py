@@ -1,132 +1,571 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import numpy as np
 import json
 import os
-import google.generativeai as genai
-from datetime import datetime, timezone
+import random
+import re
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from datetime import datetime, timedelta, timezone
 
 # --- CONFIGURATION ---
 # These keys are automatically provided by GitHub Secrets
 NEWS_API_KEY = os.environ.get('NEWS_API_KEY')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 
-# Keywords to find SSB-relevant news (Example: expanded list)
-KEYWORDS = 'DRDO OR "Indian Navy" OR "Indian Army" OR "Indian Air Force" OR ISRO OR HAL OR "Defence Ministry" OR BrahMos OR Agni-V OR Malabar OR LAC OR LOC OR Submarine OR Tejas OR Chandrayaan OR "Make in India"'
+# Keywords to find SSB-relevant news, split into shards that are fetched in parallel
+# (defence organisations vs national-security and science topics)
+KEYWORD_SHARDS = [
+    'DRDO OR "Indian Navy" OR "Indian Army" OR "Indian Air Force" OR ISRO OR HAL OR "Defence Ministry"',
+    'BrahMos OR Agni-V OR Malabar OR LAC OR LOC OR Submarine OR Tejas OR Chandrayaan OR "Make in India"',
+]
 
 # The output file your HTML reads
 OUTPUT_FILE = 'news.json'
+
+# How many of the newest articles the site shows
+MAX_ARTICLES = 35
+
+# How many articles are packed into a single Gemini request
+BATCH_SIZE = 8
+
+# Extra articles queued for summarizing beyond MAX_ARTICLES, so a failed batch
+# doesn't leave the site short; the list is trimmed to MAX_ARTICLES afterwards
+SUMMARY_MARGIN = BATCH_SIZE
+
+# Article text shorter than this (after removing NewsAPI's truncation marker) is not worth summarizing
+MIN_TEXT_LENGTH = 120
+# Only the opening of an article matters for a 60-word summary, so longer text is cut here
+MAX_TEXT_LENGTH = 1500
+
+# A small, fast model is enough for a short summary and a one-of-four category
+GEMINI_MODEL = 'gemini-2.5-flash-lite'
+MAX_OUTPUT_TOKENS_PER_ARTICLE = 160
+
+# The four categories shown on the Current Affairs page
+CATEGORIES = ["Defence", "National", "International", "Sci & Tech"]
+
+# Sent once per Gemini request, ahead of the JSON array of numbered articles
+SYSTEM_INSTRUCTION = (
+    "You are an expert news summarizer for an SSB (Service Selection Board) academy website. "
+    "The user message is a JSON array of articles, each with an id and its text. "
+    "For each article, summarize the news for an SSB aspirant in about 60 words, providing slightly more detail. "
+    f"Also assign a category: {', '.join(CATEGORIES)}. "
+    "Return one result per article, using the article's id."
+)
+
+# Gemini returns structured JSON matching this schema, so no markdown fences need stripping
+RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER"},
+            "summary": {"type": "STRING"},
+            "category": {"type": "STRING", "enum": CATEGORIES},
+        },
+        "required": ["id", "summary", "category"],
+    },
+}
+
+# Gemini requests run in parallel, throttled to stay under the per-minute quota
+MAX_WORKERS = 8
+GEMINI_REQUESTS_PER_MINUTE = 15
+# Rate-limited (429) Gemini requests are retried this many times, waiting as long as Gemini asks;
+# a longer requested wait (e.g. an exhausted daily quota) is not worth holding the job for
+GEMINI_RATE_LIMIT_RETRIES = 4
+GEMINI_MAX_RETRY_DELAY = 60
+
+# AI results are cached between runs, keyed by a hash of the article text
+CACHE_FILE = 'summary_cache.json'
+CACHE_TTL = timedelta(days=7)
+
+# Near-duplicate articles (same story, different outlet) reuse a cached summary
+# when their embeddings are at least this similar. gemini-embedding-001 scores unrelated
+# stories on the same topic highly, so the bar is set high: a missed match only costs
+# one extra summary, while a false match publishes a headline with another story's summary.
+EMBEDDING_MODEL = 'gemini-embedding-001'
+EMBEDDING_DIMENSIONS = 768
+SIMILARITY_THRESHOLD = 0.95
+
+# Embeddings of the cached summaries; kept out of git and restored between runs by actions/cache
+EMBEDDINGS_FILE = 'summary_embeddings.npz'
 # ---
 
-def get_ai_summary(text):
-    """Uses Gemini to summarize and categorize the news."""
-    if not GEMINI_API_KEY: 
-        print("GEMINI_API_KEY not found.")
+# One shared session so every request reuses pooled keep-alive connections.
+# Server errors are retried by urllib3: the first retry is immediate, later ones back off
+# 3s, 6s, 12s (plus up to 1s of jitter, capped at 30s), and a Retry-After header is honoured.
+# 429s are not retried here; post_to_gemini() retries them through the rate limiter.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=4,
+        backoff_factor=1.5,
+        backoff_max=30,
+        backoff_jitter=1.0,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+    ),
+))
+
+# Start times of the Gemini requests sent within the last minute
+_gemini_request_times = deque()
+_gemini_rate_lock = threading.Lock()
+
+def wait_for_gemini_slot():
+    """Blocks until another Gemini request fits in the sliding one-minute window."""
+    while True:
+        with _gemini_rate_lock:
+            now = time.monotonic()
+            while _gemini_request_times and now - _gemini_request_times[0] >= 60:
+                _gemini_request_times.popleft()
+
+            if len(_gemini_request_times) < GEMINI_REQUESTS_PER_MINUTE:
+                _gemini_request_times.append(now)
+                return
+
+            wait_seconds = 60 - (now - _gemini_request_times[0])
+
+        time.sleep(wait_seconds)
+
+def get_retry_delay(response):
+    """Returns how many seconds a 429 response asks to wait, from Gemini's retryDelay or Retry-After."""
+    try:
+        for detail in response.json()['error'].get('details', []):
+            if 'retryDelay' in detail:
+                return float(detail['retryDelay'].rstrip('s'))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
         return None
-    
-    # Use the supported model: gemini-2.5-flash
-    genai.configure(api_key=GEMINI_API_KEY)
-    
-    # The prompt requests a detailed 60-word summary and specific JSON output
-    prompt = f"""
-    You are an expert news summarizer for an SSB (Service Selection Board) academy website.
-    Summarize this news for an SSB aspirant in about 60 words, providing slightly more detail. 
-    Also assign a category: "Defence", "National", "International", or "Sci & Tech".
-
-    Analyze the text and return *only* a single valid JSON object in the following format:
-    {{"summary": "Your concise summary here.", "category": "One of the categories"}}
-
-    ARTICLE TEXT:
-    "{text}"
-    """
-    
-    # Use the stable REST API endpoint for Gemini 2.5 Flash
-    gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_API_KEY}"
-    
+
+def post_to_gemini(url, data, **kwargs):
+    """POSTs to Gemini through the rate limiter, retrying 429 responses after the delay Gemini asks for."""
     headers = {"Content-Type": "application/json"}
+    for attempt in range(GEMINI_RATE_LIMIT_RETRIES + 1):
+        wait_for_gemini_slot()
+        response = SESSION.post(url, headers=headers, data=json.dumps(data), **kwargs)
+        if response.status_code != 429 or attempt == GEMINI_RATE_LIMIT_RETRIES:
+            return response
+
+        # Fall back to exponential backoff, and add jitter so parallel workers don't retry in lockstep
+        delay = get_retry_delay(response)
+        if delay is None:
+            delay = min(30, 1.5 * 2 ** attempt)
+        elif delay > GEMINI_MAX_RETRY_DELAY:
+            print(f"Gemini asked to wait {delay:.0f}s, longer than {GEMINI_MAX_RETRY_DELAY}s. Giving up.")
+            return response
+        delay += random.uniform(0, 1)
+        response.close()
+
+        print(f"Gemini rate limit hit. Retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+def normalize_title(title, source_name=None):
+    """Lowercases a headline and strips a trailing " - <source name>" (or "|", "\u2013", "\u2014") suffix.
+
+    Only the article's own source name is stripped, so "Explained | ..." style headlines stay distinct.
+    """
+    title = ' '.join(title.lower().split())
+    if source_name:
+        source_name = ' '.join(source_name.lower().split())
+        for separator in (' - ', ' | ', ' \u2013 ', ' \u2014 '):
+            suffix = separator + source_name
+            if title.endswith(suffix) and len(title) > len(suffix):
+                return title[:-len(suffix)]
+    return title
+
+def clean_article_text(text):
+    """Strips NewsAPI's "... [+1234 chars]" tail and trims the text to MAX_TEXT_LENGTH,
+    ending on a sentence boundary where possible. Returns None if too little text is left to summarize."""
+    if not text:
+        return None
+
+    text = re.sub(r'\s*(?:\.\.\.|\u2026)?\s*\[\+\d+ chars\]\s*$', '', text).strip()
+    if len(text) < MIN_TEXT_LENGTH:
+        return None
+
+    if len(text) > MAX_TEXT_LENGTH:
+        text = text[:MAX_TEXT_LENGTH]
+        sentences = re.split(r'(?<=[.!?])\s', text)
+        trimmed_text = ' '.join(sentences[:-1])
+        # Keep the hard cut when ending on a sentence would leave too little text
+        if len(trimmed_text) >= MIN_TEXT_LENGTH:
+            text = trimmed_text
+    return text
+
+def load_previous_articles():
+    """Returns the articles published by the previous run, or an empty list if there are none."""
+    try:
+        with open(OUTPUT_FILE, encoding='utf-8') as f:
+            return json.load(f).get('articles', [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+def get_cache_key(text):
+    """Returns the cache key for an article's text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def load_summary_cache():
+    """Loads cached AI results from CACHE_FILE, dropping entries older than CACHE_TTL."""
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    cutoff = datetime.now(timezone.utc) - CACHE_TTL
+    fresh_cache = {}
+    for key, entry in cache.items():
+        try:
+            if datetime.fromisoformat(entry['cached_at']) >= cutoff:
+                fresh_cache[key] = entry
+        except (KeyError, TypeError, ValueError):
+            continue
+    return fresh_cache
+
+def write_json_atomically(path, data):
+    """Writes compact UTF-8 JSON via a temporary file and rename, so the site never serves a half-written file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def save_summary_cache(cache):
+    """Writes the AI result cache back to CACHE_FILE."""
+    write_json_atomically(CACHE_FILE, cache)
+
+def load_embeddings(summary_cache):
+    """Loads the cached embeddings from EMBEDDINGS_FILE, keeping only those of entries still in the summary cache."""
+    try:
+        with np.load(EMBEDDINGS_FILE) as stored:
+            keys, vectors = stored['keys'], stored['vectors']
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        # A missing or corrupt file just means starting without cached embeddings;
+        # it is overwritten at the end of the run
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring unreadable {EMBEDDINGS_FILE}: {e}")
+        return {}
+
+    return {str(key): vector for key, vector in zip(keys, vectors) if str(key) in summary_cache}
+
+def save_embeddings(embeddings):
+    """Writes the cached embeddings back to EMBEDDINGS_FILE."""
+    keys = list(embeddings)
+    vectors = np.array([embeddings[key] for key in keys], dtype=np.float32).reshape(-1, EMBEDDING_DIMENSIONS)
+    tmp_path = EMBEDDINGS_FILE + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, keys=np.array(keys, dtype=str), vectors=vectors)
+    os.replace(tmp_path, EMBEDDINGS_FILE)
+
+def get_embeddings(texts):
+    """Embeds the texts with Gemini. Returns a list of unit vectors, or None on failure."""
+    if not GEMINI_API_KEY:
+        return None
+
+    embed_url = f"https://generativelanguage.googleapis.com/v1beta/models/{EMBEDDING_MODEL}:batchEmbedContents?key={GEMINI_API_KEY}"
+
+    embeddings = []
+    texts_iter = iter(texts)
+    try:
+        # The batch endpoint accepts at most 100 texts per request
+        while True:
+            chunk = list(islice(texts_iter, 100))
+            if not chunk:
+                break
+
+            data = {
+                "requests": [{
+                    "model": f"models/{EMBEDDING_MODEL}",
+                    "content": {"parts": [{"text": text}]},
+                    "taskType": "SEMANTIC_SIMILARITY",
+                    "outputDimensionality": EMBEDDING_DIMENSIONS
+                } for text in chunk]
+            }
+
+            response = post_to_gemini(embed_url, data, timeout=30)
+            response.raise_for_status()
+
+            for embedding in response.json()['embeddings']:
+                vector = np.array(embedding['values'], dtype=np.float32)
+                embeddings.append(vector / np.linalg.norm(vector))
+
+    except Exception as e:
+        print(f"Error calling Gemini embeddings: {e}")
+        return None
+
+    return embeddings
+
+def find_near_duplicates(uncached_texts, cached_embeddings):
+    """Matches uncached articles against cached and earlier uncached ones by embedding similarity.
+
+    `cached_embeddings` holds the vectors of already summarized articles.
+    Returns (aliases, embeddings): `aliases` maps the key of each near-duplicate article to the key
+    whose summary it should reuse; `embeddings` holds the vectors of the remaining uncached articles.
+    """
+    aliases = {}
+    embeddings = {}
+    if not uncached_texts:
+        return aliases, embeddings
+
+    vectors = get_embeddings(list(uncached_texts.values()))
+    if vectors is None:
+        return aliases, embeddings
+
+    index_keys = list(cached_embeddings)
+    index_vectors = list(cached_embeddings.values())
+
+    for key, vector in zip(list(uncached_texts), vectors):
+        if index_vectors:
+            similarities = np.dot(np.vstack(index_vectors), vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= SIMILARITY_THRESHOLD:
+                aliases[key] = index_keys[best]
+                continue
+
+        index_keys.append(key)
+        index_vectors.append(vector)
+        embeddings[key] = vector
+
+    return aliases, embeddings
+
+def get_ai_summaries_batch(texts):
+    """Summarizes and categorizes several articles with a single Gemini request.
+
+    Returns a list aligned with `texts`; entries are None where the AI result is missing.
+    """
+    results = [None] * len(texts)
+    if not GEMINI_API_KEY:
+        print("GEMINI_API_KEY not found.")
+        return results
+
+    # Only the numbered articles change per request; the instructions travel in systemInstruction
+    articles_payload = json.dumps([{"id": i, "text": text} for i, text in enumerate(texts)])
+
+    # Use the stable REST API endpoint
+    gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+
     data = {
+        "systemInstruction": {
+            "parts": [{"text": SYSTEM_INSTRUCTION}]
+        },
         "contents": [{
-            "parts": [{"text": prompt}]
-        }]
+            "parts": [{"text": articles_payload}]
+        }],
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": RESPONSE_SCHEMA,
+            # A low temperature keeps summaries consistent, which also suits the summary cache
+            "temperature": 0.2,
+            "maxOutputTokens": MAX_OUTPUT_TOKENS_PER_ARTICLE * len(texts),
+        }
     }
 
     try:
-        response = requests.post(gemini_url, headers=headers, data=json.dumps(data), timeout=20)
-        response.raise_for_status() 
-        
+        response = post_to_gemini(gemini_url, data, timeout=60)
+        response.raise_for_status()
+
         result = response.json()
-        
-        # Extract and clean the JSON response from AI
-        raw_json_text = result['candidates'][0]['content']['parts'][0]['text']
-        cleaned_json_text = raw_json_text.strip().replace("```json", "").replace("```", "").strip()
-        
-        return json.loads(cleaned_json_text)
+
+        # Report why Gemini stopped early (e.g. MAX_TOKENS or SAFETY) instead of failing on truncated JSON
+        if not result.get('candidates'):
+            block_reason = result.get('promptFeedback', {}).get('blockReason', 'no candidates returned')
+            print(f"Gemini returned no summaries for this batch: {block_reason}")
+            return results
+
+        candidate = result['candidates'][0]
+        finish_reason = candidate.get('finishReason', 'STOP')
+        if finish_reason != 'STOP':
+            print(f"Gemini stopped early for this batch of {len(texts)} articles: {finish_reason}")
+            return results
+
+        raw_json_text = candidate['content']['parts'][0]['text']
+        for item in json.loads(raw_json_text):
+            index = item.get('id')
+            if isinstance(index, int) and 0 <= index < len(texts):
+                results[index] = item
 
     except Exception as e:
         print(f"Error calling Gemini: {e}")
-        return None
 
-def fetch_and_process_news():
-    """Main function to fetch news, summarize, and write to news.json"""
-    if not NEWS_API_KEY:
-        print("NEWS_API_KEY not found. Exiting.")
-        return
+    return results
 
-    print("Fetching news from NewsAPI...")
+def fetch_news_shard(keywords):
+    """Fetches the latest articles for one keyword shard from NewsAPI."""
     news_url = (f'https://newsapi.org/v2/everything?'
-                f'q={KEYWORDS}&'
+                f'q={keywords}&'
                 f'language=en&'
                 f'sortBy=publishedAt&'
-                f'pageSize=50&' # Fetching 50 articles now
+                f'pageSize=100&' # NewsAPI's maximum, so one request per shard gives the most candidates
                 f'apiKey={NEWS_API_KEY}')
 
+    # A failed shard only loses its own articles; the other shard's articles are still used
     try:
-        response = requests.get(news_url)
+        response = SESSION.get(news_url, timeout=30)
         news_data = response.json()
 
         if news_data['status'] != 'ok':
             print(f"Error from NewsAPI: {news_data.get('message')}")
-            return
+            return []
 
-        initial_articles_list = []
+        return news_data['articles']
+
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        print(f"Error fetching news from NewsAPI: {e}")
+        return []
+
+def fetch_and_process_news():
+    """Main function to fetch news, summarize, and write to news.json"""
+    if not NEWS_API_KEY:
+        print("NEWS_API_KEY not found. Exiting.")
+        return
+
+    try:
+        final_articles_list = []
         
         # 1. Capture the current time (This is the "Last Updated" time for the whole site)
         workflow_timestamp = datetime.now(timezone.utc).isoformat()
-        
-        for article in news_data['articles']:
-            title = article.get('title')
-            url = article.get('url')
-            article_date = article.get('publishedAt') 
-            text_to_summarize = article.get('content') or article.get('description')
 
-            if not text_to_summarize or not title or not url:
-                continue
+        summary_cache = load_summary_cache()
+        cached_embeddings = load_embeddings(summary_cache)
+        candidates = []
+
+        # Articles already on the site are kept as they are and never sent to Gemini again
+        previous_articles = [a for a in load_previous_articles() if a.get('url') and a.get('title')]
+        seen_urls = {a['url'] for a in previous_articles}
+        seen_titles = {normalize_title(a['title'], a.get('source')) for a in previous_articles}
+        print(f"Loaded {len(previous_articles)} articles from the previous run.")
+
+        print("Fetching news from NewsAPI...")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            # 2. Fetch every keyword shard in parallel; the top articles can only be picked once all have arrived
+            fetched_articles = [article for shard_articles in executor.map(fetch_news_shard, KEYWORD_SHARDS)
+                                for article in shard_articles]
+
+            # Deduplicate the articles by URL and by headline before paying for any AI calls
+            unique_articles = []
+            for article in fetched_articles:
+                title = article.get('title')
+                url = article.get('url')
+                if not title or not url:
+                    continue
+
+                source_name = (article.get('source') or {}).get('name')
+                normalized_title = normalize_title(title, source_name)
+                if url in seen_urls or normalized_title in seen_titles:
+                    continue
 
-            print(f"\nProcessing article: {title[:30]}...")
-            
-            ai_result = get_ai_summary(text_to_summarize)
-            
-            if ai_result and ai_result.get('summary') and ai_result.get('category'):
+                seen_urls.add(url)
+                seen_titles.add(normalized_title)
+                unique_articles.append(article)
+
+            print(f"Fetched {len(fetched_articles)} articles. New unique count: {len(unique_articles)} articles.")
+
+            # 3. Collect the articles worth summarizing
+            texts_to_summarize = []
+            for article in unique_articles:
+                text_to_summarize = (clean_article_text(article.get('content'))
+                                     or clean_article_text(article.get('description')))
+                if text_to_summarize:
+                    texts_to_summarize.append((article, text_to_summarize))
+
+            # Only the newest articles can make it onto the site, so queue the newest ones until, together
+            # with the newer previous articles, MAX_ARTICLES plus a margin for summaries that fail are covered
+            texts_to_summarize.sort(key=lambda item: item[0].get('publishedAt') or '', reverse=True)
+            previous_dates = [a.get('date') or '' for a in previous_articles]
+            uncached_texts = {}
+            for article, text_to_summarize in texts_to_summarize:
+                article_date = article.get('publishedAt') or ''
+                newer_previous = sum(date > article_date for date in previous_dates)
+                if newer_previous + len(candidates) >= MAX_ARTICLES + SUMMARY_MARGIN:
+                    break
+
+                cache_key = get_cache_key(text_to_summarize)
+                candidates.append((article, cache_key))
+                if cache_key not in summary_cache:
+                    uncached_texts[cache_key] = text_to_summarize
+
+            # Reuse summaries of near-duplicate articles instead of summarizing them again
+            aliases, embeddings = find_near_duplicates(uncached_texts, cached_embeddings)
+            for cache_key in aliases:
+                del uncached_texts[cache_key]
+
+            print(f"{len(candidates) - len(uncached_texts) - len(aliases)} articles already summarized, "
+                  f"{len(aliases)} near-duplicates, {len(uncached_texts)} to summarize.")
+
+            # Summarize the uncached articles in batches, sending the Gemini requests concurrently
+            batch_futures = {}
+            uncached_iter = iter(uncached_texts.items())
+            while True:
+                batch = list(islice(uncached_iter, BATCH_SIZE))
+                if not batch:
+                    break
+                future = executor.submit(get_ai_summaries_batch, [text for _, text in batch])
+                batch_futures[future] = batch
+
+            for number, future in enumerate(as_completed(batch_futures), start=1):
+                cached_at = datetime.now(timezone.utc).isoformat()
+                for (cache_key, _), ai_result in zip(batch_futures[future], future.result()):
+                    if ai_result and ai_result.get('summary') and ai_result.get('category'):
+                        summary_cache[cache_key] = {
+                            "summary": ai_result['summary'],
+                            "category": ai_result['category'],
+                            "cached_at": cached_at,
+                        }
+                        if cache_key in embeddings:
+                            cached_embeddings[cache_key] = embeddings[cache_key]
+                print(f"\nFinished batch {number} of {len(batch_futures)}.")
+
+        # Near-duplicates take the summary of the article they matched
+        for cache_key, source_key in aliases.items():
+            if source_key in summary_cache:
+                summary_cache[cache_key] = {
+                    "summary": summary_cache[source_key]['summary'],
+                    "category": summary_cache[source_key]['category'],
+                    "cached_at": datetime.now(timezone.utc).isoformat(),
+                }
+
+        save_summary_cache(summary_cache)
+        save_embeddings(cached_embeddings)
+
+        # Assemble the newly summarized articles
+        for article, cache_key in candidates:
+            title = article['title']
+            ai_result = summary_cache.get(cache_key)
+            if ai_result:
                 formatted_article = {
                     "title": title,
                     "summary": ai_result['summary'],
-                    "url": url,
+                    "url": article['url'],
                     "category": ai_result['category'],
-                    "date": article_date, # Publication date of the article
+                    "date": article.get('publishedAt'), # Publication date of the article
+                    "source": (article.get('source') or {}).get('name'),
                 }
-                initial_articles_list.append(formatted_article)
-                print(f"-> Success. Category: {ai_result['category']}")
+                final_articles_list.append(formatted_article)
+                print(f"-> {title[:30]}... Success. Category: {ai_result['category']}")
             else:
-                print("-> Failed to get AI summary. Skipping.")
+                print(f"-> {title[:30]}... Failed to get AI summary. Skipping.")
 
-        
-        # 3. Deduplicate the articles using the URL (unique identifier)
-        unique_articles = {}
-        for article in initial_articles_list:
-            if article['url'] not in unique_articles:
-                unique_articles[article['url']] = article
-        
-        final_articles_list = list(unique_articles.values())
+        # Merge them with the previous run's articles and keep the newest
+        new_article_count = len(final_articles_list)
+        final_articles_list.extend(previous_articles)
+        final_articles_list.sort(key=lambda a: a.get('date') or '', reverse=True)
+        final_articles_list = final_articles_list[:MAX_ARTICLES]
 
-        print(f"Initial article count: {len(initial_articles_list)}. Final unique count: {len(final_articles_list)} articles.")
+        print(f"Added {new_article_count} new articles to {len(previous_articles)} previous ones.")
 
         # 4. Create the final data structure with the timestamp
         final_json_data = {
@@ -135,8 +574,7 @@ def fetch_and_process_news():
         }
 
         # Write the final list to the JSON file
-        with open(OUTPUT_FILE, 'w') as f:
-            json.dump(final_json_data, f, indent=4)
+        write_json_atomically(OUTPUT_FILE, final_json_data)
         
         print(f"\nSuccessfully created {OUTPUT_FILE} with {len(final_articles_list)} unique articles.")
 